@@ -12,10 +12,8 @@ describing function analysis.
 
 """
 
-import math
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy
+import scipy.optimize
 from warnings import warn
 
 from .freqplot import nyquist_plot
@@ -32,7 +30,8 @@ class DescribingFunctionNonlinearity():
     that have an analytically defined describing function.  Subclasses should
     override the `__call__` and `describing_function` methods and (optionally)
     the `_isstatic` method (should be `False` if `__call__` updates the
-    instance state).
+    instance state) and `_isvectorized` method (should be `True` if
+    `__call__` processes arrays of inputs in order).
 
     """
     def __init__(self):
@@ -66,10 +65,26 @@ class DescribingFunctionNonlinearity():
         """
         return False
 
+    def _isvectorized(self):
+        """Return True if the function processes arrays of inputs in order
+
+        This internal function is used to optimize numerical computation of
+        the describing function.  It can be set to `True` if `__call__`
+        accepts an array of input values and returns an array of the same
+        shape, processing the elements in (row major) order so that any
+        internal state is updated as if the elements were passed one at a
+        time.  Assumed False by default (static functions are always
+        evaluated on arrays if possible).
+
+        """
+        return False
+
     # Utility function used to compute common describing functions
     def _f(self, x):
-        return math.copysign(1, x) if abs(x) > 1 else \
-            (math.asin(x) + x * math.sqrt(1 - x**2)) * 2 / math.pi
+        x_sat = np.clip(x, -1, 1)
+        return np.where(
+            abs(x) > 1, np.sign(x),
+            (np.arcsin(x_sat) + x_sat * np.sqrt(1 - x_sat**2)) * 2 / np.pi)
 
 
 def describing_function(
@@ -89,6 +104,11 @@ def describing_function(
         input/output systems, the output can also return a 1D array with a
         single element.
 
+        If the function is static (an `_isstatic` method that returns
+        `True`) and also accepts an array of input values (returning an
+        array of the same shape), it will be evaluated along the sinusoids
+        for all amplitudes with a single call (one row per amplitude).
+
         If the function is an object with a method `describing_function`
         then this method will be used to computing the describing function
         instead of a nonlinear computation.  Some common nonlinearities
@@ -124,6 +144,10 @@ def describing_function(
     # If there is an analytical solution, trying using that first
     if try_method and hasattr(F, 'describing_function'):
         try:
+            if _isvectorized_describing_function(F):
+                # Evaluate all amplitudes with a single call
+                return np.asarray(F.describing_function(
+                    np.asarray(A, dtype=float)), dtype=complex)
             return np.vectorize(F.describing_function, otypes=[complex])(A)
         except NotImplementedError:
             # Drop through and do the numerical computation
@@ -156,48 +180,85 @@ def describing_function(
     #
 
     # Evaluate over a full range of angles (leave off endpoint a la DFT)
-    theta, dtheta = np.linspace(
-        0, 2*np.pi, num_points, endpoint=False, retstep=True)
-    sin_theta = np.sin(theta)
-    cos_theta = np.cos(theta)
+    sin_theta, basis = _sinusoid_samples(num_points)
 
     # See if this is a static nonlinearity (assume not, just in case)
     if not hasattr(F, '_isstatic') or not F._isstatic():
         # Initialize any internal state by going through an initial cycle
-        for x in np.atleast_1d(A).min() * sin_theta:
-            F(x)                # ignore the result
+        _evaluate_along_sinusoid(F, np.atleast_1d(A).min() * sin_theta)
 
-    # Go through all of the amplitudes we were given
+    # Set up the array of amplitudes and the return values
     retdf = np.empty(np.shape(A), dtype=complex)
-    df = retdf                  # Access to the return array
-    df.shape = (-1, )           # as a 1D array
-    for i, a in enumerate(np.atleast_1d(A)):
-        # Make sure we got a valid argument
-        if a == 0:
-            # Check to make sure the function has zero output with zero input
-            if zero_check and np.squeeze(F(0.)) != 0:
-                raise ValueError("function must evaluate to zero at zero")
-            df[i] = 1.
-            continue
-        elif a < 0:
-            raise ValueError("cannot evaluate describing function for A < 0")
+    df = retdf.reshape(-1)      # Access to the return array as a 1D view
+    amp = np.asarray(A, dtype=float).reshape(-1)
+
+    # Make sure we got valid arguments
+    if np.any(amp < 0):
+        raise ValueError("cannot evaluate describing function for A < 0")
 
-        # Save the scaling factor to make the formulas simpler
-        scale = dtheta / np.pi / a
+    # Check to make sure the function has zero output with zero input
+    zero = amp == 0
+    if np.any(zero):
+        if zero_check and np.squeeze(F(0.)) != 0:
+            raise ValueError("function must evaluate to zero at zero")
+        df[zero] = 1.
 
-        # Evaluate the function along a sinusoid
-        F_eval = np.array([F(x) for x in a*sin_theta]).squeeze()
+    if not np.all(zero):
+        nonzero = np.logical_not(zero)
 
-        # Compute the prjections onto sine and cosine
-        df_real = (F_eval @ sin_theta) * scale     # = M_1 \cos\phi / a
-        df_imag = (F_eval @ cos_theta) * scale     # = M_1 \sin\phi / a
+        # Evaluate the function along a sinusoid for all amplitudes at once
+        F_vals = _evaluate_along_sinusoid(
+            F, amp[nonzero, None] * sin_theta)  # len(amp) x num_points
 
-        df[i] = df_real + 1j * df_imag
+        # Compute the projections onto sine and cosine (single matrix product)
+        proj = F_vals @ basis           # len(amp) x 2
+
+        # Scale to get the describing function: M_1 e^{j \phi} / a
+        # (using dtheta / pi = 2 / num_points)
+        df[nonzero] = (proj[:, 0] + 1j * proj[:, 1]) * \
+            (2 / (num_points * amp[nonzero]))
 
     # Return the values in the same shape as they were requested
     return retdf
 
 
+# Cache of sinusoid samples, indexed by the number of points
+_sinusoid_cache = {}
+
+
+# Utility function to compute (and cache) the samples of a sinusoid
+def _sinusoid_samples(num_points):
+    if num_points not in _sinusoid_cache:
+        theta = np.linspace(0, 2*np.pi, num_points, endpoint=False)
+        sin_theta = np.sin(theta)
+        basis = np.stack([sin_theta, np.cos(theta)], axis=1)  # num_points x 2
+
+        # Make sure the cached values can't be modified
+        sin_theta.flags.writeable = basis.flags.writeable = False
+        _sinusoid_cache[num_points] = sin_theta, basis
+
+    return _sinusoid_cache[num_points]
+
+
+# Utility function to evaluate a nonlinearity along sinusoidal input(s)
+def _evaluate_along_sinusoid(F, x):
+    # For static functions (or functions that process arrays in order), try
+    # to evaluate all points with a single call to the function
+    if hasattr(F, '_isstatic') and F._isstatic() or \
+       hasattr(F, '_isvectorized') and F._isvectorized():
+        try:
+            F_eval = np.asarray(F(x), dtype=float)
+            if F_eval.shape == x.shape:
+                return F_eval
+        except (TypeError, ValueError):
+            pass
+
+    # Evaluate the function one point at a time (in order)
+    return np.fromiter(
+        (float(np.squeeze(F(x_i))) for x_i in x.flat),
+        dtype=float, count=x.size).reshape(x.shape)
+
+
 def describing_function_plot(
         H, F, A, omega=None, refine=True, label="%5.2g @ %-5.2g", **kwargs):
     """Plot a Nyquist plot with a describing function for a nonlinear system.
@@ -237,9 +298,11 @@ def describing_function_plot(
     >>> F_saturation = ct.descfcn.saturation_nonlinearity(1)
     >>> amp = np.linspace(1, 4, 10)
     >>> ct.describing_function_plot(H_simple, F_saturation, amp)
-    [(3.344008947853124, 1.414213099755523)]
+    [(3.3439987302064957, 1.4142135623730951)]
 
     """
+    import matplotlib.pyplot as plt
+
     # Start by drawing a Nyquist curve
     count, contour = nyquist_plot(
         H, omega, plot=True, return_contour=True, **kwargs)
@@ -252,79 +315,116 @@ def describing_function_plot(
     # Now add the describing function curve to the plot
     plt.plot(N_vals.real, N_vals.imag)
 
+    # Residual function used to refine intersection points.  The solver
+    # perturbs one argument at a time when estimating the Jacobian, so cache
+    # the describing function and frequency response values to avoid
+    # recomputing them (the frequency response is also reused for labels).
+    df_cache, H_cache = {}, {}
+    def _H(omega):
+        if omega not in H_cache:
+            H_cache[omega] = H(1j * omega)
+        return H_cache[omega]
+
+    def _residual(x):
+        # If arguments are invalid, return a "large" value
+        # Note: imposing bounds messed up the optimization (?)
+        if x[0] < 0 or x[1] < 0:
+            return [1, 1]
+        if x[0] not in df_cache:
+            df_cache[x[0]] = describing_function(F, x[0])
+        err = 1 + _H(x[1]) * df_cache[x[0]]
+        return [err.real, err.imag]
+
     # Look for intersection points
     intersections = []
-    for i in range(N_vals.size - 1):
-        for j in range(H_vals.size - 1):
-            intersect = _find_intersection(
-                N_vals[i], N_vals[i+1], H_vals[j], H_vals[j+1])
-            if intersect == None:
-                continue
-
-            # Found an intersection, compute a and omega
-            s_amp, s_omega = intersect
-            a_guess = (1 - s_amp) * A[i] + s_amp * A[i+1]
-            omega_guess = (1 - s_omega) * H_omega[j] + s_omega * H_omega[j+1]
-
-            # Refine the coarse estimate to get better intersection point
+    for i, j, s_amp, s_omega in zip(*_find_intersections(N_vals, H_vals)):
+        # Found an intersection, compute a and omega
+        a_guess = (1 - s_amp) * A[i] + s_amp * A[i+1]
+        omega_guess = (1 - s_omega) * H_omega[j] + s_omega * H_omega[j+1]
+
+        # Refine the coarse estimate to get better intersection point
+        a_final, omega_final = a_guess, omega_guess
+        if refine:
+            # Improve the initial estimate by resampling the curves finely
+            a_guess, omega_guess = _refine_intersection(
+                F, H, A[i], A[i+1], H_omega[j], H_omega[j+1],
+                a_guess, omega_guess)
             a_final, omega_final = a_guess, omega_guess
-            if refine:
-                # Refine the answer to get more accuracy
-                def _cost(x):
-                    # If arguments are invalid, return a "large" value
-                    # Note: imposing bounds messed up the optimization (?)
-                    if x[0] < 0 or x[1] < 0:
-                        return 1
-                    return abs(1 + H(1j * x[1]) *
-                               describing_function(F, x[0]))**2
-                res = scipy.optimize.minimize(
-                    _cost, [a_guess, omega_guess])
-                # bounds=[(A[i], A[i+1]), (H_omega[j], H_omega[j+1])])
-
-                if not res.success:
-                    warn("not able to refine result; returning estimate")
-                else:
-                    a_final, omega_final = res.x[0], res.x[1]
-
-            # Add labels to the intersection points
-            if isinstance(label, str):
-                pos = H(1j * omega_final)
-                plt.text(pos.real, pos.imag, label % (a_final, omega_final))
-            elif label is not None or label is not False:
-                raise ValueError("label must be formatting string or None")
-
-            # Save the final estimate
-            intersections.append((a_final, omega_final))
+
+            # Refine the answer to get more accuracy by solving the (square)
+            # system of equations Re, Im (1 + H(j omega) N(a)) = 0
+            res = scipy.optimize.root(
+                _residual, [a_guess, omega_guess])
+
+            if not res.success:
+                warn("not able to refine result; returning estimate")
+            else:
+                a_final, omega_final = res.x[0], res.x[1]
+
+        # Add labels to the intersection points
+        if isinstance(label, str):
+            pos = _H(omega_final)
+            plt.text(pos.real, pos.imag, label % (a_final, omega_final))
+        elif label is not None or label is not False:
+            raise ValueError("label must be formatting string or None")
+
+        # Save the final estimate
+        intersections.append((a_final, omega_final))
 
     return intersections
 
 
-# Utility function to figure out whether two line segments intersection
-def _find_intersection(L1a, L1b, L2a, L2b):
-    # Compute the tangents for the segments
-    L1t = L1b - L1a
-    L2t = L2b - L2a
+# Utility function to improve the estimate of an intersection point by
+# finely sampling the describing function and frequency response between the
+# endpoints of the intersecting segments
+def _refine_intersection(
+        F, H, a_min, a_max, omega_min, omega_max, a_guess, omega_guess,
+        num_samples=10):
+    a_fine = np.linspace(a_min, a_max, num_samples + 1)
+    omega_fine = np.linspace(omega_min, omega_max, num_samples + 1)
+    i, j, s_amp, s_omega = _find_intersections(
+        -1/describing_function(F, a_fine), H(1j * omega_fine))
+    if i.size == 0:
+        # Curves too far from linear; stick with the original estimate
+        return a_guess, omega_guess
+
+    return (a_fine[i[0]] + s_amp[0] * (a_fine[i[0]+1] - a_fine[i[0]]),
+            omega_fine[j[0]] + s_omega[0] *
+            (omega_fine[j[0]+1] - omega_fine[j[0]]))
+
+
+# Utility function to find the intersections between two piecewise linear
+# curves, given as arrays of complex points.  Returns the indices of the
+# intersecting segments and the proportional distance along each segment.
+def _find_intersections(L1, L2):
+    # Set up the segments as (len(L1)-1) x (len(L2)-1) arrays
+    L1a, L1t = L1[:-1, None], np.diff(L1)[:, None]
+    L2a, L2t = L2[None, :-1], np.diff(L2)[None, :]
 
     # Set up components of the solution: b = M s
     b = L1a - L2a
     detM = L1t.imag * L2t.real - L1t.real * L2t.imag
-    if abs(detM) < 1e-8:        # TODO: fix magic number
-        return None
+    valid = abs(detM) >= 1e-8   # TODO: fix magic number
+    detM = np.where(valid, detM, 1)
 
     # Solve for the intersection points on each line segment
     s1 = (L2t.imag * b.real - L2t.real * b.imag) / detM
-    if s1 < 0 or s1 > 1:
-        return None
-
     s2 = (L1t.imag * b.real - L1t.real * b.imag) / detM
-    if s2 < 0 or s2 > 1:
-        return None
 
-    # Debugging test
-    # np.testing.assert_almost_equal(L1a + s1 * L1t, L2a + s2 * L2t)
+    # Intersections must lie within both segments
+    i, j = np.nonzero(valid & (s1 >= 0) & (s1 <= 1) & (s2 >= 0) & (s2 <= 1))
+    return i, j, s1[i, j], s2[i, j]
+
 
-    # Intersection is within segments; return proportional distance
-    return (s1, s2)
+# Utility function to check whether a nonlinearity uses one of the built-in
+# describing functions, which accept arrays of amplitudes.  Subclasses that
+# override the describing_function method are evaluated one amplitude at a
+# time, since their method may only accept scalars.
+def _isvectorized_describing_function(F):
+    return getattr(type(F), 'describing_function', None) in (
+        saturation_nonlinearity.describing_function,
+        relay_hysteresis_nonlinearity.describing_function,
+        friction_backlash_nonlinearity.describing_function)
 
 
 # Saturation nonlinearity
@@ -367,16 +467,18 @@ class saturation_nonlinearity(DescribingFunctionNonlinearity):
         return True
 
     def describing_function(self, A):
-        # Check to make sure the amplitude is positive
-        if A < 0:
+        # Check to make sure the amplitude(s) are positive
+        A = np.asarray(A, dtype=float)
+        if np.any(A < 0):
             raise ValueError("cannot evaluate describing function for A < 0")
 
-        if self.lb <= A and A <= self.ub:
-            return 1.
-        else:
-            alpha, beta = math.asin(self.ub/A), math.asin(-self.lb/A)
-            return (math.sin(alpha + beta) * math.cos(alpha - beta) +
-                    (alpha + beta)) / math.pi
+        # Compute the saturation angles (limited to pi/2 for linear region)
+        with np.errstate(divide='ignore'):
+            alpha = np.arcsin(np.minimum(self.ub/A, 1))
+            beta = np.arcsin(np.minimum(-self.lb/A, 1))
+        df = (np.sin(alpha + beta) * np.cos(alpha - beta) +
+              (alpha + beta)) / np.pi
+        return np.where((self.lb <= A) & (A <= self.ub), 1., df)[()]
 
 
 # Relay with hysteresis (FBS2e, Example 10.12)
@@ -394,7 +496,9 @@ class relay_hysteresis_nonlinearity(DescribingFunctionNonlinearity):
 
     The output of this function is `b` if `x > c` and `-b` if `x < -c`.  For
     `-c <= x <= c`, the value depends on the branch of the hysteresis loop (as
-    illustrated in Figure 10.20 of FBS2e).
+    illustrated in Figure 10.20 of FBS2e).  If an array of inputs is given,
+    the elements are processed in order and the output has the same shape as
+    the input.
 
     """
     def __init__(self, b, c):
@@ -407,6 +511,10 @@ class relay_hysteresis_nonlinearity(DescribingFunctionNonlinearity):
         self.c = c              # size of hysteresis region
 
     def __call__(self, x):
+        # Process arrays of input values (in order) separately
+        if np.ndim(x) > 0:
+            return self._call_array(np.asarray(x, dtype=float))
+
         if x > self.c:
             y = self.b
             self.branch = 1
@@ -419,20 +527,38 @@ class relay_hysteresis_nonlinearity(DescribingFunctionNonlinearity):
             y = self.b
         return y
 
+    def _call_array(self, x):
+        # Find the branch set by inputs outside of the hysteresis region
+        x_flat = x.reshape(-1)
+        switch = np.where(
+            x_flat > self.c, 1, np.where(x_flat < -self.c, -1, 0))
+
+        # Inside the region, use the branch from the last switching point
+        last = np.maximum.accumulate(
+            np.where(switch != 0, np.arange(x_flat.size), -1))
+        branch = np.where(last >= 0, switch[last], self.branch)
+
+        if branch.size > 0:
+            self.branch = int(branch[-1])
+        return (self.b * branch).reshape(x.shape)
+
     def _isstatic(self):
         return False
 
+    def _isvectorized(self):
+        return True
+
     def describing_function(self, A):
-        # Check to make sure the amplitude is positive
-        if A < 0:
+        # Check to make sure the amplitude(s) are positive
+        A = np.asarray(A, dtype=float)
+        if np.any(A < 0):
             raise ValueError("cannot evaluate describing function for A < 0")
 
-        if A < self.c:
-            return np.nan
-
-        df_real = 4 * self.b * math.sqrt(1 - (self.c/A)**2) / (A * math.pi)
-        df_imag = -4 * self.b * self.c / (math.pi * A**2)
-        return df_real + 1j * df_imag
+        with np.errstate(divide='ignore', invalid='ignore'):
+            df_real = 4 * self.b * np.sqrt(1 - (self.c/A)**2) / (A * np.pi)
+            df_imag = -4 * self.b * self.c / (np.pi * A**2)
+            df = df_real + 1j * df_imag
+        return np.where(A < self.c, np.nan, df)[()]
 
 
 # Friction-dominated backlash nonlinearity (#48 in Gelb and Vander Velde, 1968)
@@ -449,7 +575,8 @@ class friction_backlash_nonlinearity(DescribingFunctionNonlinearity):
     This function maintains an internal state representing the 'center' of a
     mechanism with backlash.  If the new input is within `b/2` of the current
     center, the output is unchanged.  Otherwise, the output is given by the
-    input shifted by `b/2`.
+    input shifted by `b/2`.  If an array of inputs is given, the elements
+    are processed in order and the output has the same shape as the input.
 
     """
 
@@ -461,6 +588,13 @@ class friction_backlash_nonlinearity(DescribingFunctionNonlinearity):
         self.center = 0         # current center position
 
     def __call__(self, x):
+        # Process arrays of input values (in order) separately
+        if np.ndim(x) > 0:
+            x_array = np.asarray(x, dtype=float)
+            y, self.center = _backlash_scan(
+                x_array.reshape(-1), self.center, self.b)
+            return y.reshape(x_array.shape)
+
         # If we are outside the backlash, move and shift the center
         if x - self.center > self.b/2:
             self.center = x - self.b/2
@@ -471,14 +605,30 @@ class friction_backlash_nonlinearity(DescribingFunctionNonlinearity):
     def _isstatic(self):
         return False
 
+    def _isvectorized(self):
+        return True
+
     def describing_function(self, A):
-        # Check to make sure the amplitude is positive
-        if A < 0:
+        # Check to make sure the amplitude(s) are positive
+        A = np.asarray(A, dtype=float)
+        if np.any(A < 0):
             raise ValueError("cannot evaluate describing function for A < 0")
 
-        if A <= self.b/2:
-            return 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            df_real = (1 + self._f(1 - self.b/A)) / 2
+            df_imag = -(2 * self.b/A - (self.b/A)**2) / np.pi
+            df = df_real + 1j * df_imag
+        return np.where(A <= self.b/2, 0, df)[()]
 
-        df_real = (1 + self._f(1 - self.b/A)) / 2
-        df_imag = -(2 * self.b/A - (self.b/A)**2) / math.pi
-        return df_real + 1j * df_imag
+
+# Utility function to compute the output of a backlash for a sequence of inputs
+def _backlash_scan(x, center, b):
+    y = np.empty(x.size)
+    for i, x_i in enumerate(x.tolist()):
+        # If we are outside the backlash, move and shift the center
+        if x_i - center > b/2:
+            center = x_i - b/2
+        elif x_i - center < -b/2:
+            center = x_i + b/2
+        y[i] = center
+    return y, center
@@ -194,3 +194,175 @@ def test_describing_function_exceptions():
     amp = np.linspace(1, 4, 10)
     with pytest.raises(ValueError, match="formatting string"):
         ct.describing_function_plot(H_simple, F_saturation, amp, label=1)
+
+
+def test_describing_function_vectorized():
+    # Scalar-only implementation of saturation (rejects array arguments)
+    def saturation_scalar(x):
+        return math.copysign(min(abs(x), 1), x)
+
+    # Count the number of calls made to a static, vectorized nonlinearity
+    class saturation_counted:
+        ncalls = 0
+        def __call__(self, x):
+            self.ncalls += 1
+            return saturation(x)
+        def _isstatic(self):
+            return True
+
+    amprange = np.linspace(0.5, 10, 20)
+    satfcn = saturation_counted()
+    df_scalar = ct.describing_function(saturation_scalar, amprange)
+    df_vector = ct.describing_function(satfcn, amprange)
+    np.testing.assert_almost_equal(df_vector, df_scalar)
+
+    # Function should be called once for all amplitudes
+    assert satfcn.ncalls == 1
+
+
+def test_describing_function_stateful_broadcast():
+    # Stateful nonlinearity (rate limiter) that happens to accept arrays
+    class rate_limiter:
+        def __init__(self):
+            self.y = 0
+        def __call__(self, x):
+            self.y = self.y + np.clip(x - self.y, -0.1, 0.1)
+            return self.y
+
+    # Must be evaluated one point at a time (same as scalar evaluation)
+    amprange = [0.5, 1, 2]
+    df = ct.describing_function(rate_limiter(), amprange)
+    df_scalar = ct.describing_function(
+        lambda x, F=rate_limiter(): float(F(float(x))), amprange)
+    np.testing.assert_almost_equal(df, df_scalar)
+    np.testing.assert_almost_equal(df[:2], [1, 1], decimal=3)
+
+
+def test_saturation_array():
+    # Saturation should be evaluated elementwise on arrays (single pass)
+    satfcn = saturation_nonlinearity(1)
+    x = np.array([[-2, -1, -0.5], [0, 0.5, 2]])
+    np.testing.assert_array_equal(
+        satfcn(x), [[-1, -1, -0.5], [0, 0.5, 1]])
+    assert satfcn(2.) == 1.
+
+
+def test_backlash_array():
+    # Evaluating an array should match evaluating the elements in order
+    x = np.sin(np.linspace(0, 4*np.pi, 50)) * 3
+    backlash_scalar = friction_backlash_nonlinearity(2)
+    y_scalar = [backlash_scalar(x_i) for x_i in x]
+    backlash_array = friction_backlash_nonlinearity(2)
+    y_array = backlash_array(x.reshape(5, 10))
+    assert y_array.shape == (5, 10)
+    np.testing.assert_array_equal(y_array.reshape(-1), y_scalar)
+    assert backlash_array.center == backlash_scalar.center
+
+    # Scalar inputs should return scalar outputs
+    assert np.ndim(backlash_scalar(0.)) == 0
+
+
+def test_find_intersections():
+    # Two zig-zag curves with known intersections
+    L1 = np.array([0, 1 + 1j, 2, 3 + 1j])
+    L2 = np.array([-1 + 0.5j, 4 + 0.5j])
+    i, j, s1, s2 = ct.descfcn._find_intersections(L1, L2)
+    np.testing.assert_array_equal(i, [0, 1, 2])
+    np.testing.assert_array_equal(j, [0, 0, 0])
+
+    # Intersection points should agree on both segments
+    np.testing.assert_almost_equal(
+        L1[i] + s1 * (L1[i+1] - L1[i]), L2[j] + s2 * (L2[j+1] - L2[j]))
+    np.testing.assert_almost_equal(
+        L1[i] + s1 * (L1[i+1] - L1[i]), [0.5 + 0.5j, 1.5 + 0.5j, 2.5 + 0.5j])
+
+    # Parallel segments and segments with NaN values don't intersect
+    i, j, s1, s2 = ct.descfcn._find_intersections(
+        np.array([0, 1, np.nan, 3]), np.array([1j, 1 + 1j]))
+    assert i.size == 0
+
+
+def test_saturation_describing_function_array():
+    # Vectorized describing function should match the scalar computation
+    with pytest.warns(UserWarning, match="asymmetric"):
+        satfcn = saturation_nonlinearity(lb=-1, ub=2)
+    amprange = np.linspace(2, 10, 20)
+    df_scalar = [satfcn.describing_function(a) for a in amprange]
+    df_array = ct.describing_function(satfcn, amprange)
+    np.testing.assert_almost_equal(df_array, df_scalar)
+
+
+def test_describing_function_override():
+    # Subclasses that override describing_function should use that method
+    class my_saturation(saturation_nonlinearity):
+        def describing_function(self, A):
+            return 42.
+    np.testing.assert_equal(
+        ct.describing_function(my_saturation(1), [2., 3.]), [42, 42])
+
+
+def test_relay_hysteresis_array():
+    # Evaluating an array should match evaluating the elements in order
+    x = np.sin(np.linspace(0, 4*np.pi, 50)) * 2 + 0.5
+    relay_scalar = relay_hysteresis_nonlinearity(1, 1)
+    y_scalar = [relay_scalar(x_i) for x_i in x]
+    relay_array = relay_hysteresis_nonlinearity(1, 1)
+    y_array = relay_array(x.reshape(5, 10))
+    assert y_array.shape == (5, 10)
+    np.testing.assert_array_equal(y_array.reshape(-1), y_scalar)
+    assert relay_array.branch == relay_scalar.branch
+
+    # Inputs inside the hysteresis region keep the current branch
+    relay_array(2)
+    np.testing.assert_array_equal(relay_array([0, 0.5, -0.5]), [1, 1, 1])
+    np.testing.assert_array_equal(relay_array([0, -2, 0.5]), [1, -1, -1])
+
+
+@pytest.mark.parametrize("fcn", [saturation, saturation_nonlinearity(1)])
+@pytest.mark.parametrize("amp", [2., [2.], [[0.5, 2.], [3., 4.]]])
+def test_describing_function_shape(fcn, amp):
+    # Returned values should have the same shape as the amplitudes
+    df = ct.describing_function(fcn, amp)
+    assert df.shape == np.shape(amp)
+    df_anal = np.vectorize(saturation_class().describing_function)(amp)
+    np.testing.assert_almost_equal(df, df_anal, decimal=3)
+
+
+def test_describing_function_plot_norefine():
+    # Without refinement, return the linear interpolation estimate
+    H_larger = ct.tf([8], [1, 2, 2, 1])
+    omega = np.logspace(-1, 2, 100)
+    F_saturation = ct.descfcn.saturation_nonlinearity(1)
+    amp = np.linspace(1, 4, 10)
+    xsects = ct.describing_function_plot(
+        H_larger, F_saturation, amp, omega, refine=False)
+
+    N_vals = -1/ct.describing_function(F_saturation, amp)
+    H_vals = H_larger(1j * omega)
+    i, j, s_amp, s_omega = ct.descfcn._find_intersections(N_vals, H_vals)
+    assert len(xsects) == i.size == 1
+    np.testing.assert_almost_equal(xsects[0], (
+        (1 - s_amp[0]) * amp[i[0]] + s_amp[0] * amp[i[0]+1],
+        (1 - s_omega[0]) * omega[j[0]] + s_omega[0] * omega[j[0]+1]))
+
+
+@pytest.mark.parametrize("cls, args", [
+    (relay_hysteresis_nonlinearity, (1, 1)),
+    (friction_backlash_nonlinearity, (2, ))])
+def test_describing_function_methods_array(cls, args):
+    # Analytical describing functions should accept scalars and arrays
+    fcn = cls(*args)
+    amp = np.array([0.5, 1., 2., 4.])
+    df_array = fcn.describing_function(amp)
+    df_scalar = [fcn.describing_function(a) for a in amp]
+    assert np.isscalar(df_scalar[-1])
+    np.testing.assert_almost_equal(df_array, df_scalar)
+    np.testing.assert_almost_equal(
+        ct.describing_function(fcn, amp[1:]), df_array[1:])
+
+    # Subclasses that override describing_function should use that method
+    class my_nonlinearity(cls):
+        def describing_function(self, A):
+            return 42.
+    np.testing.assert_equal(
+        ct.describing_function(my_nonlinearity(*args), [2., 3.]), [42, 42])